@@ -109,6 +109,11 @@ TEMPLATES = [
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db()}
 
+# https://docs.djangoproject.com/en/dev/ref/settings/#caches
+# The cached dashboards, counts and list ETags are dropped by whichever worker handles the write, so every
+# worker must read the same cache. The per-process local memory cache is only good enough for development.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://") if DEBUG else env.cache("CACHE_URL")}
+
 # Password validation
 # https://docs.djangoproject.com/en/dev/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -166,6 +171,13 @@ STORAGES = {
     },
 }
 
+# https://whitenoise.readthedocs.io/en/latest/django.html#WHITENOISE_MAX_AGE
+# Manifest-hashed files already get a far-future expiry, this extends it to any unhashed file
+WHITENOISE_MAX_AGE = 0 if DEBUG else 60 * 60 * 24 * 365
+
+# https://whitenoise.readthedocs.io/en/latest/django.html#WHITENOISE_KEEP_ONLY_HASHED_FILES
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/stable/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1 +1,81 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import Category, Expense, ExpenseSplit, Group, GroupMemberBalance, Settlement
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ["name", "created_by"]
+    list_select_related = ["created_by"]
+    search_fields = ["name"]
+
+
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ["name", "created_by", "default_currency", "is_active"]
+    list_select_related = ["created_by"]
+    list_filter = ["is_active"]
+    search_fields = ["name"]
+    filter_horizontal = ["members"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+
+class ExpenseSplitInline(admin.TabularInline):
+    model = ExpenseSplit
+    extra = 0
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+        # Every inline row renders the same user dropdown, evaluate it once per request
+        if db_field.name == "user":
+            if not hasattr(request, "_split_user_choices"):
+                request._split_user_choices = list(formfield.choices)
+            formfield.choices = request._split_user_choices
+
+        return formfield
+
+
+@admin.register(Expense)
+class ExpenseAdmin(admin.ModelAdmin):
+    list_display = ["description", "amount", "expense_type", "user", "paid_by", "group", "category", "date"]
+    list_select_related = ["user", "paid_by", "group", "category"]
+    list_filter = ["expense_type", "date"]
+    search_fields = ["description"]
+    inlines = [ExpenseSplitInline]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+
+@admin.register(ExpenseSplit)
+class ExpenseSplitAdmin(admin.ModelAdmin):
+    list_display = ["expense", "user", "split_type", "amount", "is_settled"]
+    list_select_related = ["expense", "user"]
+    list_filter = ["split_type", "is_settled"]
+
+
+@admin.register(Settlement)
+class SettlementAdmin(admin.ModelAdmin):
+    list_display = ["group", "paid_by", "paid_to", "amount", "settlement_date"]
+    list_select_related = ["group", "paid_by", "paid_to"]
+    list_filter = ["settlement_date"]
+
+
+@admin.register(GroupMemberBalance)
+class GroupMemberBalanceAdmin(admin.ModelAdmin):
+    list_display = ["group", "user", "paid_total", "owed_total"]
+    list_select_related = ["group", "user"]
+    readonly_fields = ["group", "user", "paid_total", "owed_total"]
+
+    # The rows are maintained by GroupMemberBalance.objects.refresh(), manual edits would drift from it
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SplitConfig(AppConfig):
     name = "core.split"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,32 @@
+import threading
+
+from django.db import transaction
+
+_pending = threading.local()
+
+
+def schedule_balance_refresh(group_id):
+    """
+    Refresh the group's GroupMemberBalance rows once the current transaction commits
+
+    Saving or deleting many splits in one transaction refreshes the group only once. The cached data of
+    the group's members is dropped after the refresh.
+    """
+    if not group_id:
+        return
+    if not hasattr(_pending, "group_ids"):
+        _pending.group_ids = set()
+    _pending.group_ids.add(group_id)
+    transaction.on_commit(_refresh_pending)
+
+
+def _refresh_pending():
+    from .caching import invalidate_group_caches
+    from .models import GroupMemberBalance
+
+    group_ids = getattr(_pending, "group_ids", set())
+    _pending.group_ids = set()
+    for group_id in group_ids:
+        GroupMemberBalance.objects.refresh(group_id)
+        # Dropped only now, a dashboard cached between the commit and the refresh would keep the old totals
+        invalidate_group_caches(group_id)
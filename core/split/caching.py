@@ -0,0 +1,84 @@
+import uuid
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+COUNT_CACHE_TIMEOUT = 60
+CATEGORY_CACHE_TIMEOUT = 60 * 5
+# An expired version only costs one full render, it bounds how long a missed invalidation can serve a 304
+LIST_VERSION_TIMEOUT = 60 * 60
+
+
+def dashboard_cache_key(user_id):
+    return f"dashboard:{user_id}"
+
+
+def group_count_cache_key(user_id):
+    return f"groups:count:{user_id}"
+
+
+def settlement_count_cache_key(group_id):
+    return f"settlements:count:{group_id}"
+
+
+def category_cache_key(user_id):
+    # System categories (no owner) are shared by every user
+    return f"categories:{user_id or 'system'}"
+
+
+def list_version_key(user_id):
+    # Replaced whenever something the user's list pages show changes, system categories share one key
+    return f"lists:{user_id or 'system'}"
+
+
+def _delete_on_commit(keys):
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_user_caches(user_ids):
+    """
+    Drop the cached dashboard data, group count and list version of the given users once the current
+    transaction commits
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    _delete_on_commit(
+        [dashboard_cache_key(user_id) for user_id in user_ids]
+        + [group_count_cache_key(user_id) for user_id in user_ids]
+        + [list_version_key(user_id) for user_id in user_ids]
+    )
+
+
+def invalidate_group_caches(group_id):
+    """
+    Drop the cached data of every member of the group
+    """
+    from .models import Group
+
+    member_ids = Group.members.through.objects.filter(group_id=group_id).values_list("user_id", flat=True)
+    invalidate_user_caches(member_ids)
+
+
+def invalidate_settlement_count(group_id):
+    _delete_on_commit([settlement_count_cache_key(group_id)])
+
+
+def invalidate_categories(user_id):
+    _delete_on_commit([category_cache_key(user_id), list_version_key(user_id)])
+
+
+def _list_version(user_id):
+    return cache.get_or_set(list_version_key(user_id), lambda: uuid.uuid4().hex, LIST_VERSION_TIMEOUT)
+
+
+def list_etag(request, *args, **kwargs):
+    """
+    ETag of the list pages for the condition() decorator, browsers revalidate with it and get a 304
+    until one of the invalidate_* helpers above drops the user's list version
+    """
+    # Anonymous users are redirected to login, pending messages must be rendered
+    if not request.user.is_authenticated or len(messages.get_messages(request)):
+        return None
+    return f"{request.user.pk}-{_list_version(request.user.pk)}-{_list_version(None)}"
@@ -2,39 +2,56 @@ from decimal import Decimal
 
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 from djmoney.money import Money
 
 from accounts.models import User
 
+from .balances import schedule_balance_refresh
+from .caching import invalidate_user_caches
 from .models import Category, Expense, ExpenseSplit, Group, Settlement
 
+_ZERO = Decimal("0.00")
+_ONE_CENT = Decimal("0.01")
+_HUNDRED = Decimal("100.00")
+
+# Widgets repeated across the forms below. Django deep-copies widgets into every bound form,
+# so sharing one instance between fields and forms is safe.
+_SELECT = forms.Select(attrs={"class": "form-control"})
+_DATE_INPUT = forms.DateInput(attrs={"class": "form-control", "type": "date"})
+_AMOUNT_INPUT = forms.NumberInput(attrs={"class": "form-control", "placeholder": "0.00", "step": "0.01"})
+_NOTES_TEXTAREA = forms.Textarea(
+    attrs={"class": "form-control", "rows": 2, "placeholder": "Additional notes (optional)"}
+)
+
+# Common currencies offered as a group's default currency
+CURRENCY_CHOICES = (
+    ("INR", "INR - Indian Rupee (₹)"),
+    ("USD", "USD - US Dollar ($)"),
+    ("EUR", "EUR - Euro (€)"),
+    ("GBP", "GBP - British Pound (£)"),
+    ("JPY", "JPY - Japanese Yen (¥)"),
+    ("AUD", "AUD - Australian Dollar (A$)"),
+    ("CAD", "CAD - Canadian Dollar (C$)"),
+    ("SGD", "SGD - Singapore Dollar (S$)"),
+)
+
 
 class GroupForm(forms.ModelForm):
     """
     Form for creating and editing groups
     """
 
-    # Define currency choices (common currencies)
-    CURRENCY_CHOICES = [
-        ("INR", "INR - Indian Rupee (₹)"),
-        ("USD", "USD - US Dollar ($)"),
-        ("EUR", "EUR - Euro (€)"),
-        ("GBP", "GBP - British Pound (£)"),
-        ("JPY", "JPY - Japanese Yen (¥)"),
-        ("AUD", "AUD - Australian Dollar (A$)"),
-        ("CAD", "CAD - Canadian Dollar (C$)"),
-        ("SGD", "SGD - Singapore Dollar (S$)"),
-    ]
-
     default_currency = forms.ChoiceField(
         choices=CURRENCY_CHOICES,
         initial="INR",
-        widget=forms.Select(attrs={"class": "form-control"}),
+        widget=_SELECT,
         label="Default Currency",
     )
 
     members = forms.ModelMultipleChoiceField(
-        queryset=User.objects.all(),
+        queryset=User.objects.none(),
         widget=forms.CheckboxSelectMultiple(attrs={"class": "form-check-input"}),
         required=True,
         help_text="Select members to add to this group",
@@ -54,9 +71,14 @@ class GroupForm(forms.ModelForm):
         self.user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
 
+        # Only the columns used by User.__str__ are needed to render the checkboxes
+        members = User.objects.only("id", "email", "full_name")
+
         # Exclude current user from members selection (will be added automatically)
         if self.user:
-            self.fields["members"].queryset = User.objects.exclude(id=self.user.id)
+            members = members.exclude(id=self.user.id)
+
+        self.fields["members"].queryset = members
 
     def save(self, commit=True):
         instance = super().save(commit=False)
@@ -64,11 +86,24 @@ class GroupForm(forms.ModelForm):
             instance.created_by = self.user
 
         if commit:
-            instance.save()
+            adding = instance._state.adding
+            member_ids = {member.id for member in self.cleaned_data["members"]}
             # Add the creator as a member
-            members = list(self.cleaned_data["members"])
-            members.append(self.user)
-            instance.members.set(members)
+            if self.user:
+                member_ids.add(self.user.id)
+
+            # Write the through rows directly instead of members.set(), which diffs against the current rows
+            Membership = Group.members.through
+            with transaction.atomic():
+                instance.save()
+                if not adding:
+                    Membership.objects.filter(group_id=instance.id).exclude(user_id__in=member_ids).delete()
+                Membership.objects.bulk_create(
+                    [Membership(group_id=instance.id, user_id=user_id) for user_id in member_ids],
+                    ignore_conflicts=True,
+                )
+                # bulk_create sends no signals, and removed members were already covered by the group's post_save
+                invalidate_user_caches(member_ids)
 
         return instance
 
@@ -82,8 +117,8 @@ class ExpenseForm(forms.ModelForm):
     amount = forms.DecimalField(
         max_digits=14,
         decimal_places=2,
-        min_value=Decimal("0.01"),
-        widget=forms.NumberInput(attrs={"class": "form-control", "placeholder": "0.00", "step": "0.01"}),
+        min_value=_ONE_CENT,
+        widget=_AMOUNT_INPUT,
         label="Amount (₹)",
     )
 
@@ -94,14 +129,12 @@ class ExpenseForm(forms.ModelForm):
             "description": forms.TextInput(
                 attrs={"class": "form-control", "placeholder": "e.g., Dinner at restaurant"}
             ),
-            "expense_type": forms.Select(attrs={"class": "form-control"}),
-            "group": forms.Select(attrs={"class": "form-control"}),
-            "paid_by": forms.Select(attrs={"class": "form-control"}),
-            "category": forms.Select(attrs={"class": "form-control"}),
-            "date": forms.DateInput(attrs={"class": "form-control", "type": "date"}),
-            "notes": forms.Textarea(
-                attrs={"class": "form-control", "rows": 2, "placeholder": "Additional notes (optional)"}
-            ),
+            "expense_type": _SELECT,
+            "group": _SELECT,
+            "paid_by": _SELECT,
+            "category": _SELECT,
+            "date": _DATE_INPUT,
+            "notes": _NOTES_TEXTAREA,
         }
 
     def __init__(self, *args, **kwargs):
@@ -112,9 +145,17 @@ class ExpenseForm(forms.ModelForm):
         if self.user:
             self.fields["group"].queryset = Group.objects.filter(members=self.user, is_active=True)
 
+            # System categories plus the user's own
+            self.fields["category"].queryset = Category.objects.filter(
+                Q(created_by__isnull=True) | Q(created_by=self.user)
+            ).only("id", "name")
+
             # Set user as default for paid_by
             self.fields["paid_by"].initial = self.user
 
+        # Only the columns used by User.__str__ are needed to render the payer choices
+        self.fields["paid_by"].queryset = User.objects.only("id", "email", "full_name")
+
         # Make group optional initially (required for group expenses via JS or validation)
         self.fields["group"].required = False
 
@@ -138,11 +179,21 @@ class ExpenseForm(forms.ModelForm):
 
         # Validate paid_by is a member of the group for group expenses
         if expense_type == Expense.ExpenseType.GROUP and group and paid_by:
-            if not group.members.filter(id=paid_by.id).exists():
+            if not self._is_group_member(group, paid_by):
                 raise ValidationError({"paid_by": "Payer must be a member of the group."})
 
         return cleaned_data
 
+    def _is_group_member(self, group, user):
+        """
+        Check group membership, skipping the query when the answer is already known
+        """
+        # The group choices are limited to groups the current user belongs to
+        if self.user and user.pk == self.user.pk:
+            return True
+
+        return group.is_member(user)
+
     def save(self, commit=True):
         instance = super().save(commit=False)
 
@@ -179,27 +230,29 @@ class ExpenseSplitFormSet(forms.BaseFormSet):
         if any(self.errors):
             return
 
-        total_amount = Decimal("0.00")
-        total_percentage = Decimal("0.00")
+        total_amount = _ZERO
+        total_percentage = _ZERO
         total_shares = 0
-        users = []
+        seen_user_ids = set()
 
         for form in self.forms:
-            if form.cleaned_data and not form.cleaned_data.get("DELETE", False):
-                user = form.cleaned_data.get("user")
-                amount = form.cleaned_data.get("amount")
-                percentage = form.cleaned_data.get("percentage")
-                shares = form.cleaned_data.get("shares")
+            cleaned_data = form.cleaned_data
+            if cleaned_data and not cleaned_data.get("DELETE", False):
+                user = cleaned_data.get("user")
+                amount = cleaned_data.get("amount_value")
+                percentage = cleaned_data.get("percentage")
+                shares = cleaned_data.get("shares")
 
                 # Check for duplicate users
-                if user in users:
+                user_id = user.pk if user else None
+                if user_id in seen_user_ids:
                     raise ValidationError("Each user can only be added once.")
-                users.append(user)
+                seen_user_ids.add(user_id)
 
                 # Validate based on split type
                 if self.split_type == ExpenseSplit.SplitType.EXACT:
                     if amount:
-                        total_amount += Decimal(str(amount))
+                        total_amount += amount
 
                 elif self.split_type == ExpenseSplit.SplitType.PERCENTAGE:
                     if percentage:
@@ -211,16 +264,16 @@ class ExpenseSplitFormSet(forms.BaseFormSet):
 
         # Validate totals
         if self.expense:
-            expense_amount = Decimal(str(self.expense.amount.amount))
+            expense_amount = self.expense.amount.amount
 
             if self.split_type == ExpenseSplit.SplitType.EXACT:
-                if abs(total_amount - expense_amount) > Decimal("0.01"):
+                if abs(total_amount - expense_amount) > _ONE_CENT:
                     raise ValidationError(
                         f"Split amounts must equal expense amount. Total: ₹{total_amount}, Expected: ₹{expense_amount}"
                     )
 
             elif self.split_type == ExpenseSplit.SplitType.PERCENTAGE:
-                if abs(total_percentage - Decimal("100.00")) > Decimal("0.01"):
+                if abs(total_percentage - _HUNDRED) > _ONE_CENT:
                     raise ValidationError(f"Percentages must add up to 100%. Current total: {total_percentage}%")
 
 
@@ -231,11 +284,12 @@ class ExpenseSplitForm(forms.ModelForm):
 
     class Meta:
         model = ExpenseSplit
-        fields = ["user", "split_type", "amount", "percentage", "shares"]
+        fields = ["user", "split_type", "amount_value", "percentage", "shares"]
+        labels = {"amount_value": "Amount"}
         widgets = {
-            "user": forms.Select(attrs={"class": "form-control"}),
-            "split_type": forms.Select(attrs={"class": "form-control"}),
-            "amount": forms.NumberInput(attrs={"class": "form-control", "placeholder": "0.00", "step": "0.01"}),
+            "user": _SELECT,
+            "split_type": _SELECT,
+            "amount_value": _AMOUNT_INPUT,
             "percentage": forms.NumberInput(
                 attrs={"class": "form-control", "placeholder": "0.00", "step": "0.01", "min": "0", "max": "100"}
             ),
@@ -248,7 +302,7 @@ class ExpenseSplitForm(forms.ModelForm):
 
         # Filter users to only group members
         if self.group:
-            self.fields["user"].queryset = self.group.members.all()
+            self.fields["user"].queryset = self.group.members.only("id", "email", "full_name")
 
 
 # Create the formset
@@ -280,9 +334,10 @@ class SimpleSplitForm(forms.Form):
         super().__init__(*args, **kwargs)
 
         if self.group:
-            self.fields["members"].queryset = self.group.members.all()
+            members = self.group.members.only("id", "email", "full_name")
+            self.fields["members"].queryset = members
             # Pre-select all members by default
-            self.fields["members"].initial = self.group.members.all()
+            self.fields["members"].initial = members
 
     def save(self):
         """
@@ -292,27 +347,39 @@ class SimpleSplitForm(forms.Form):
             return []
 
         split_type = self.cleaned_data["split_type"]
-        members = self.cleaned_data["members"]
-
-        # Delete existing splits
-        self.expense.splits.all().delete()
+        # Validation already evaluated this queryset (narrowed in __init__), list() reuses its result cache
+        members = list(self.cleaned_data["members"])
 
         splits = []
-        expense_amount = Decimal(str(self.expense.amount.amount))
-        num_members = members.count()
-
-        if split_type == ExpenseSplit.SplitType.EQUAL:
-            # Split equally among selected members
-            per_person = expense_amount / num_members
-
-            for member in members:
-                split = ExpenseSplit.objects.create(
-                    expense=self.expense,
-                    user=member,
-                    split_type=split_type,
-                    amount=Money(per_person, self.expense.amount.currency),
+        expense_amount = self.expense.amount.amount
+        num_members = len(members)
+
+        # One transaction so the group's balances are refreshed once, after the new splits exist
+        with transaction.atomic():
+            # Delete existing splits
+            self.expense.splits.all().delete()
+
+            if split_type == ExpenseSplit.SplitType.EQUAL:
+                # Split equally among selected members
+                per_person = expense_amount / num_members
+                currency_code = str(self.expense.amount.currency)
+
+                # Pass the raw decimal and currency code instead of building a Money per split
+                splits = ExpenseSplit.objects.bulk_create(
+                    [
+                        ExpenseSplit(
+                            expense_id=self.expense.id,
+                            user_id=member.id,
+                            split_type=split_type,
+                            amount_value=per_person,
+                            amount_currency=currency_code,
+                        )
+                        for member in members
+                    ]
                 )
-                splits.append(split)
+                # bulk_create sends no post_save for the new splits
+                invalidate_user_caches([member.id for member in members])
+                schedule_balance_refresh(self.expense.group_id)
 
         return splits
 
@@ -326,16 +393,14 @@ class SettlementForm(forms.ModelForm):
         model = Settlement
         fields = ["paid_by", "paid_to", "amount", "settlement_date", "payment_method", "notes"]
         widgets = {
-            "paid_by": forms.Select(attrs={"class": "form-control"}),
-            "paid_to": forms.Select(attrs={"class": "form-control"}),
-            "amount": forms.NumberInput(attrs={"class": "form-control", "placeholder": "0.00", "step": "0.01"}),
-            "settlement_date": forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+            "paid_by": _SELECT,
+            "paid_to": _SELECT,
+            "amount": _AMOUNT_INPUT,
+            "settlement_date": _DATE_INPUT,
             "payment_method": forms.TextInput(
                 attrs={"class": "form-control", "placeholder": "e.g., UPI, Cash, Bank Transfer"}
             ),
-            "notes": forms.Textarea(
-                attrs={"class": "form-control", "rows": 2, "placeholder": "Additional notes (optional)"}
-            ),
+            "notes": _NOTES_TEXTAREA,
         }
 
     def __init__(self, *args, **kwargs):
@@ -345,7 +410,7 @@ class SettlementForm(forms.ModelForm):
 
         if self.group:
             # Filter to only group members
-            members = self.group.members.all()
+            members = self.group.members.only("id", "email", "full_name")
             self.fields["paid_by"].queryset = members
             self.fields["paid_to"].queryset = members
 
@@ -390,6 +455,16 @@ class CategoryForm(forms.ModelForm):
         self.user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
 
+    def clean_name(self):
+        name = self.cleaned_data["name"]
+
+        # created_by is not a form field, so the model form skips the unique constraint
+        duplicates = Category.objects.filter(created_by=self.user, name=name).exclude(pk=self.instance.pk)
+        if self.user and duplicates.exists():
+            raise ValidationError("You already have a category with this name.")
+
+        return name
+
     def save(self, commit=True):
         instance = super().save(commit=False)
         if self.user:
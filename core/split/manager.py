@@ -0,0 +1,73 @@
+from django.db import connections, models, transaction
+from django.db.models import F, Q, Sum
+
+
+class ExpenseQuerySet(models.QuerySet):
+    def page_before(self, date, pk, limit=40):
+        """
+        Keyset page of the expenses that come after the (date, pk) cursor, newest first
+        """
+        return self.filter(Q(date__lt=date) | Q(date=date, pk__lt=pk)).order_by("-date", "-id")[:limit]
+
+
+class ExpenseSplitManager(models.Manager):
+    def get_queryset(self):
+        # __str__ reads the user and the expense
+        return super().get_queryset().select_related("user", "expense")
+
+
+class SettlementManager(models.Manager):
+    def get_queryset(self):
+        # __str__ reads both users, listings also show the group
+        return super().get_queryset().select_related("paid_by", "paid_to", "group")
+
+
+class GroupMemberBalanceManager(models.Manager):
+    def refresh(self, group_id):
+        """
+        Recompute the running totals of everyone who paid or owes in the group
+
+        Concurrent refreshes of one group are serialized on the group row, so the totals are read after the
+        previous refresh committed and the rows are never inserted twice.
+        """
+        from .models import Expense, ExpenseSplit, Group
+
+        with transaction.atomic():
+            if not Group.objects.select_for_update().filter(pk=group_id).exists():
+                return
+            paid = dict(
+                Expense.objects.filter(group_id=group_id, expense_type=Expense.ExpenseType.GROUP)
+                .values_list("paid_by_id")
+                .annotate(total=Sum("amount"))
+                .order_by()
+            )
+            owed = dict(
+                ExpenseSplit.objects.filter(expense__group_id=group_id, is_settled=False)
+                .values_list("user_id")
+                .annotate(total=Sum("amount_value"))
+                .order_by()
+            )
+
+            user_ids = paid.keys() | owed.keys()
+            rows = [
+                self.model(
+                    group_id=group_id,
+                    user_id=user_id,
+                    paid_total=paid.get(user_id, 0),
+                    owed_total=owed.get(user_id, 0),
+                )
+                for user_id in user_ids
+            ]
+            # MySQL upserts on any unique key and rejects an explicit target, (group, user) is the only one besides
+            # the primary key
+            features = connections[self.db].features
+            self.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["group", "user"] if features.supports_update_conflicts_with_target else None,
+                update_fields=["paid_total", "owed_total"],
+            )
+            self.filter(group_id=group_id).exclude(user_id__in=user_ids).delete()
+
+    def unsettled(self):
+        return self.exclude(paid_total=F("owed_total"))
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-15 20:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('split', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date'], name='split_expen_user_id_b2a153_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['group', '-date'], name='split_expen_group_i_52acfc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['paid_by', '-date'], name='split_expen_paid_by_a63f23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensesplit',
+            index=models.Index(fields=['expense', 'user'], name='split_expen_expense_36a80f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensesplit',
+            index=models.Index(fields=['user', 'is_settled'], name='split_expen_user_id_597a34_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlement',
+            index=models.Index(fields=['group', '-settlement_date'], name='split_settl_group_i_84029f_idx'),
+        ),
+    ]
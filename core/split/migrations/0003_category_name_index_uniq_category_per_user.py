@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-15 20:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_categories(apps, schema_editor):
+    """
+    Fold each user's same-named categories into the oldest one before the unique constraint is added
+    """
+    Category = apps.get_model("split", "Category")
+    Expense = apps.get_model("split", "Expense")
+
+    duplicates = (
+        Category.objects.filter(created_by__isnull=False)
+        .values("created_by", "name")
+        .annotate(keep_id=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for duplicate in duplicates:
+        extra = Category.objects.filter(created_by=duplicate["created_by"], name=duplicate["name"]).exclude(
+            id=duplicate["keep_id"]
+        )
+        Expense.objects.filter(category__in=extra).update(category_id=duplicate["keep_id"])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('split', '0002_expense_expensesplit_settlement_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_categories, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['name'], name='split_categ_name_64fce1_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('created_by', 'name'), name='uniq_category_per_user'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('split', '0003_category_name_index_uniq_category_per_user'),
+    ]
+
+    operations = [
+        # The decimal and currency columns already exist under the same names and types,
+        # only the model state moves from MoneyField to plain fields.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='expensesplit',
+                    name='amount',
+                ),
+                migrations.AddField(
+                    model_name='expensesplit',
+                    name='amount_value',
+                    field=models.DecimalField(db_column='amount', decimal_places=2, max_digits=14),
+                ),
+                migrations.AlterField(
+                    model_name='expensesplit',
+                    name='amount_currency',
+                    field=models.CharField(default='INR', max_length=3),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('split', '0004_expensesplit_amount_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['group', 'expense_type', 'paid_by'], name='split_expen_group_i_3c863d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensesplit',
+            index=models.Index(fields=['expense', 'user', 'is_settled'], name='split_expen_expense_648c9a_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='expensesplit',
+            name='split_expen_expense_36a80f_idx',
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.2 on 2026-10-15 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_group_member_balances(apps, schema_editor):
+    Expense = apps.get_model("split", "Expense")
+    ExpenseSplit = apps.get_model("split", "ExpenseSplit")
+    GroupMemberBalance = apps.get_model("split", "GroupMemberBalance")
+
+    totals = {}
+    paid = (
+        Expense.objects.filter(expense_type="group", group__isnull=False)
+        .values_list("group_id", "paid_by_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    for group_id, user_id, total in paid:
+        totals.setdefault((group_id, user_id), [0, 0])[0] = total
+
+    owed = (
+        ExpenseSplit.objects.filter(expense__group__isnull=False, is_settled=False)
+        .values_list("expense__group_id", "user_id")
+        .annotate(total=Sum("amount_value"))
+        .order_by()
+    )
+    for group_id, user_id, total in owed:
+        totals.setdefault((group_id, user_id), [0, 0])[1] = total
+
+    GroupMemberBalance.objects.bulk_create(
+        [
+            GroupMemberBalance(group_id=group_id, user_id=user_id, paid_total=paid_total, owed_total=owed_total)
+            for (group_id, user_id), (paid_total, owed_total) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('split', '0005_expense_group_type_payer_index_expensesplit_settled_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupMemberBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paid_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('owed_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='member_balances', to='split.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_balances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group', 'user'), name='uniq_balance_per_group_member')],
+            },
+        ),
+        migrations.RunPython(fill_group_member_balances, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,13 @@
 from django.db import models
+from django.utils.functional import cached_property
 from django_extensions.db.models import TimeStampedModel
 from djmoney.models.fields import MoneyField
+from djmoney.money import Money
 
 from accounts.models import User
 
+from .manager import ExpenseQuerySet, ExpenseSplitManager, GroupMemberBalanceManager, SettlementManager
+
 
 class Category(models.Model):
     """
@@ -22,6 +26,12 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["created_by", "name"], name="uniq_category_per_user"),
+        ]
 
     def __str__(self):
         return self.name
@@ -45,6 +55,18 @@ class Group(TimeStampedModel):
     def __str__(self):
         return self.name
 
+    @cached_property
+    def member_ids(self):
+        """
+        Ids of the group's members, read once per instance and from the prefetched members when present
+        """
+        if "members" in getattr(self, "_prefetched_objects_cache", {}):
+            return {member.pk for member in self.members.all()}
+        return set(self.members.values_list("id", flat=True))
+
+    def is_member(self, user):
+        return user.pk in self.member_ids
+
 
 class Expense(TimeStampedModel):
     """
@@ -77,8 +99,16 @@ class Expense(TimeStampedModel):
     date = models.DateField()
     notes = models.TextField(blank=True)
 
+    objects = ExpenseQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "-created"]
+        indexes = [
+            models.Index(fields=["user", "-date"]),
+            models.Index(fields=["group", "-date"]),
+            models.Index(fields=["paid_by", "-date"]),
+            models.Index(fields=["group", "expense_type", "paid_by"]),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.amount}"
@@ -99,12 +129,10 @@ class ExpenseSplit(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expense_splits")
     split_type = models.CharField(max_length=15, choices=SplitType.choices, default=SplitType.EQUAL)
 
-    # Using django-money MoneyField
-    amount = MoneyField(
-        max_digits=14,
-        decimal_places=2,
-        default_currency="INR",
-    )
+    # Plain decimal + currency code in the columns django-money used, so the bulk inserts
+    # skip MoneyField's per-row conversion; `amount` builds the Money on access
+    amount_value = models.DecimalField(max_digits=14, decimal_places=2, db_column="amount")
+    amount_currency = models.CharField(max_length=3, default="INR")
 
     # For percentage splits
     percentage = models.DecimalField(
@@ -122,12 +150,31 @@ class ExpenseSplit(models.Model):
 
     is_settled = models.BooleanField(default=False)
 
+    objects = ExpenseSplitManager()
+
     class Meta:
         ordering = ["user"]
+        indexes = [
+            models.Index(fields=["expense", "user", "is_settled"]),
+            models.Index(fields=["user", "is_settled"]),
+        ]
 
     def __str__(self):
         return f"{self.user.username} owes {self.amount} for {self.expense.description}"
 
+    @property
+    def amount(self):
+        if self.amount_value is None:
+            return None
+        return Money(self.amount_value, self.amount_currency)
+
+    @amount.setter
+    def amount(self, value):
+        if isinstance(value, Money):
+            self.amount_currency = str(value.currency)
+            value = value.amount
+        self.amount_value = value
+
 
 class Settlement(TimeStampedModel):
     """
@@ -152,8 +199,38 @@ class Settlement(TimeStampedModel):
     # Link to specific expense splits being settled (optional)
     expense_splits = models.ManyToManyField(ExpenseSplit, blank=True, related_name="settlements")
 
+    objects = SettlementManager()
+
     class Meta:
         ordering = ["-settlement_date", "-created"]
+        indexes = [
+            models.Index(fields=["group", "-settlement_date"]),
+        ]
 
     def __str__(self):
         return f"{self.paid_by.username} paid {self.paid_to.username} {self.amount}"
+
+
+class GroupMemberBalance(models.Model):
+    """
+    Running totals of what each member paid and owes in a group, refreshed by the signals in signals.py
+    """
+
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="member_balances")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="group_balances")
+    paid_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    owed_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = GroupMemberBalanceManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group", "user"], name="uniq_balance_per_group_member"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} in {self.group}: {self.balance}"
+
+    @property
+    def balance(self):
+        return self.paid_total - self.owed_total
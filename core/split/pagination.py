@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .caching import COUNT_CACHE_TIMEOUT
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that keeps the total in the cache instead of running COUNT(*) on every page
+    """
+
+    def __init__(self, *args, cache_key, cache_timeout=COUNT_CACHE_TIMEOUT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+        self.cache_timeout = cache_timeout
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, self.cache_timeout)
+        return count
+
+
+class CachedCountMixin:
+    """
+    ListView mixin paginating with CachedCountPaginator, the view must define get_count_cache_key()
+    returning the key its invalidation signals drop
+    """
+
+    paginator_class = CachedCountPaginator
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        if not hasattr(self, "get_count_cache_key"):
+            raise ImproperlyConfigured(f"{self.__class__.__name__} is missing a get_count_cache_key() method.")
+        kwargs.setdefault("cache_key", self.get_count_cache_key())
+        return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
@@ -0,0 +1,91 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .balances import schedule_balance_refresh
+from .caching import (
+    invalidate_categories,
+    invalidate_group_caches,
+    invalidate_settlement_count,
+    invalidate_user_caches,
+)
+from .models import Category, Expense, ExpenseSplit, Group, Settlement
+
+
+def _split_group_id(split):
+    if ExpenseSplit.expense.is_cached(split):
+        return split.expense.group_id
+    return Expense.objects.filter(pk=split.expense_id).values_list("group_id", flat=True).first()
+
+
+def _deleted_with_expense(origin):
+    # Deleting an expense cascades to its splits, expense_changed already refreshes the group then and looking
+    # it up again would cost a query per split
+    if isinstance(origin, QuerySet):
+        return origin.model is Expense
+    return isinstance(origin, Expense)
+
+
+@receiver(pre_save, sender=Expense)
+def expense_saving(sender, instance, **kwargs):
+    # An edit can move the expense to another group, whose balances then need a refresh too
+    instance._previous_group_id = None
+    if instance.pk:
+        instance._previous_group_id = Expense.objects.filter(pk=instance.pk).values_list("group_id", flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Expense)
+def expense_changed(sender, instance, **kwargs):
+    invalidate_user_caches([instance.user_id, instance.paid_by_id])
+    # The refresh also drops the cached data of the group's members, including the members of the group
+    # the expense was moved out of
+    schedule_balance_refresh(instance.group_id)
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if previous_group_id != instance.group_id:
+        schedule_balance_refresh(previous_group_id)
+
+
+@receiver([post_save, post_delete], sender=ExpenseSplit)
+def expense_split_changed(sender, instance, **kwargs):
+    invalidate_user_caches([instance.user_id])
+    if not _deleted_with_expense(kwargs.get("origin")):
+        schedule_balance_refresh(_split_group_id(instance))
+
+
+@receiver([post_save, post_delete], sender=Settlement)
+def settlement_changed(sender, instance, **kwargs):
+    invalidate_user_caches([instance.paid_by_id, instance.paid_to_id])
+    invalidate_settlement_count(instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    invalidate_group_caches(instance.id)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # The membership rows are gone by post_delete, collect the members while they still exist
+    invalidate_group_caches(instance.id)
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+def group_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Membership changed outside GroupForm (admin, members.set()), clear reports no pk_set so it is
+    # handled before the rows are removed
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        # user.expense_groups: pk_set holds group ids
+        group_ids = pk_set if pk_set is not None else instance.expense_groups.values_list("id", flat=True)
+        invalidate_user_caches([instance.pk])
+        for group_id in group_ids:
+            invalidate_group_caches(group_id)
+    else:
+        invalidate_user_caches(pk_set or [])
+        invalidate_group_caches(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_categories(instance.created_by_id)
@@ -1,4 +1,6 @@
 # your_app/templatetags/expense_filters.py
+from decimal import Decimal
+
 from django import template
 
 register = template.Library()
@@ -9,6 +11,10 @@ def abs_value(value):
     """
     Returns the absolute value of a number
     """
+    # Balances are plain numbers, handle them without setting up the try/except
+    if isinstance(value, (int, float, Decimal)):
+        return -value if value < 0 else value
+
     try:
         return abs(value)
     except (ValueError, TypeError):
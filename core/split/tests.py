@@ -1 +1,320 @@
-# Create your tests here.
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from djmoney.money import Money
+
+from .forms import SimpleSplitForm
+from .models import Category, Expense, ExpenseSplit, Group, GroupMemberBalance
+from .views import ExpenseListView
+
+User = get_user_model()
+
+
+class SplitTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(email="alice@example.com", full_name="Alice")
+        cls.bob = User.objects.create_user(email="bob@example.com", full_name="Bob")
+        cls.carol = User.objects.create_user(email="carol@example.com", full_name="Carol")
+        cls.category = Category.objects.create(name="Food", created_by=cls.alice)
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trip = Group.objects.create(name="Trip", created_by=self.alice)
+            self.trip.members.set([self.alice, self.bob])
+            self.flat = Group.objects.create(name="Flat", created_by=self.alice)
+            self.flat.members.set([self.alice, self.carol])
+
+    def create_expense(self, group, amount, paid_by, members):
+        with self.captureOnCommitCallbacks(execute=True):
+            expense = Expense.objects.create(
+                description="Dinner",
+                amount=Money(amount, "INR"),
+                expense_type=Expense.ExpenseType.GROUP,
+                user=paid_by,
+                group=group,
+                paid_by=paid_by,
+                category=self.category,
+                date=datetime.date(2025, 1, 1),
+            )
+            for member in members:
+                ExpenseSplit.objects.create(expense=expense, user=member, amount=Money(amount / len(members), "INR"))
+        return expense
+
+
+class GroupMemberBalanceTests(SplitTestCase):
+    """
+    The stored running totals always match the totals recomputed from the expenses and splits
+    """
+
+    def assertBalancesUpToDate(self):
+        expected = {}
+        paid = (
+            Expense.objects.filter(expense_type=Expense.ExpenseType.GROUP)
+            .values_list("group_id", "paid_by_id")
+            .annotate(total=Sum("amount"))
+            .order_by()
+        )
+        for group_id, user_id, total in paid:
+            expected.setdefault((group_id, user_id), [Decimal(0), Decimal(0)])[0] = total
+        owed = (
+            ExpenseSplit.objects.filter(is_settled=False, expense__group__isnull=False)
+            .values_list("expense__group_id", "user_id")
+            .annotate(total=Sum("amount_value"))
+            .order_by()
+        )
+        for group_id, user_id, total in owed:
+            expected.setdefault((group_id, user_id), [Decimal(0), Decimal(0)])[1] = total
+
+        stored = {
+            (row.group_id, row.user_id): [row.paid_total, row.owed_total] for row in GroupMemberBalance.objects.all()
+        }
+        self.assertEqual(stored, expected)
+
+    def test_create(self):
+        self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        self.assertBalancesUpToDate()
+
+    def test_edit(self):
+        expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        with self.captureOnCommitCallbacks(execute=True):
+            expense.amount = Money(60, "INR")
+            expense.paid_by = self.bob
+            expense.save()
+        self.assertBalancesUpToDate()
+
+    def test_move_to_another_group(self):
+        expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        with self.captureOnCommitCallbacks(execute=True):
+            expense.group = self.flat
+            expense.save()
+        self.assertBalancesUpToDate()
+        self.assertEqual(GroupMemberBalance.objects.filter(group=self.trip, paid_total__gt=0).count(), 0)
+
+    def test_move_to_personal(self):
+        expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        with self.captureOnCommitCallbacks(execute=True):
+            expense.group = None
+            expense.expense_type = Expense.ExpenseType.PERSONAL
+            expense.save()
+        self.assertBalancesUpToDate()
+
+    def test_delete(self):
+        self.create_expense(self.trip, Decimal("40"), self.bob, [self.alice, self.bob])
+        expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        with self.captureOnCommitCallbacks(execute=True):
+            expense.delete()
+        self.assertBalancesUpToDate()
+
+    def test_delete_does_not_look_up_the_group_per_split(self):
+        expense = self.create_expense(self.trip, Decimal("90"), self.alice, [self.alice, self.bob, self.carol])
+        expense = Expense.objects.get(pk=expense.pk)
+        # select the splits, clear their settlements, delete them, delete the expense
+        with self.assertNumQueries(4):
+            expense.delete()
+
+    def test_simple_split_form(self):
+        expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice])
+        form = SimpleSplitForm(
+            data={"split_type": ExpenseSplit.SplitType.EQUAL, "members": [self.alice.pk, self.bob.pk]},
+            group=self.trip,
+            expense=expense,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        self.assertBalancesUpToDate()
+
+    def test_dashboard_shows_refreshed_balances(self):
+        self.client.force_login(self.bob)
+        self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        self.assertEqual(self.client.get(reverse("dashboard")).context["balances"][0]["balance"], Decimal("-50"))
+
+        self.create_expense(self.trip, Decimal("20"), self.bob, [self.alice, self.bob])
+        self.assertEqual(self.client.get(reverse("dashboard")).context["balances"][0]["balance"], Decimal("-40"))
+
+    def test_admin_is_read_only(self):
+        self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        balance = GroupMemberBalance.objects.get(group=self.trip, user=self.alice)
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com"))
+
+        self.assertEqual(self.client.get(reverse("admin:split_groupmemberbalance_add")).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse("admin:split_groupmemberbalance_delete", args=[balance.pk])).status_code, 403
+        )
+        response = self.client.post(
+            reverse("admin:split_groupmemberbalance_change", args=[balance.pk]), {"paid_total": "1"}
+        )
+        self.assertEqual(response.status_code, 403)
+        balance.refresh_from_db()
+        self.assertEqual(balance.paid_total, Decimal("100"))
+
+
+class ListETagTests(SplitTestCase):
+    """
+    A list page revalidated after a write is rendered again instead of answered with 304
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+
+    def get_etag(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse("expense_list"))
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def assertNotModified(self, user, etag):
+        self.client.force_login(user)
+        response = self.client.get(reverse("expense_list"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def assertModified(self, user, etag):
+        self.client.force_login(user)
+        response = self.client.get(reverse("expense_list"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged(self):
+        etag = self.get_etag(self.bob)
+        self.assertNotModified(self.bob, etag)
+
+    def test_create(self):
+        etag = self.get_etag(self.bob)
+        self.create_expense(self.trip, Decimal("10"), self.alice, [self.alice])
+        self.assertModified(self.bob, etag)
+
+    def test_edit(self):
+        etag = self.get_etag(self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expense.description = "Lunch"
+            self.expense.save()
+        self.assertModified(self.bob, etag)
+
+    def test_move_to_personal(self):
+        etag = self.get_etag(self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expense.group = None
+            self.expense.expense_type = Expense.ExpenseType.PERSONAL
+            self.expense.save()
+        self.assertModified(self.bob, etag)
+
+    def test_move_to_another_group(self):
+        bob_etag = self.get_etag(self.bob)
+        carol_etag = self.get_etag(self.carol)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expense.group = self.flat
+            self.expense.save()
+        self.assertModified(self.bob, bob_etag)
+        self.assertModified(self.carol, carol_etag)
+
+    def test_delete(self):
+        etag = self.get_etag(self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expense.delete()
+        self.assertModified(self.bob, etag)
+
+    def test_simple_split_form(self):
+        etag = self.get_etag(self.bob)
+        form = SimpleSplitForm(
+            data={"split_type": ExpenseSplit.SplitType.EQUAL, "members": [self.alice.pk]},
+            group=self.trip,
+            expense=self.expense,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            form.save()
+        self.assertModified(self.bob, etag)
+
+    def test_members_changed_outside_group_form(self):
+        bob_etag = self.get_etag(self.bob)
+        carol_etag = self.get_etag(self.carol)
+        # What the admin change form does after saving the group
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trip.members.set([self.alice, self.carol])
+        self.assertModified(self.bob, bob_etag)
+        self.assertModified(self.carol, carol_etag)
+
+    def test_members_cleared(self):
+        etag = self.get_etag(self.carol)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flat.members.clear()
+        self.assertModified(self.carol, etag)
+
+    def test_group_hard_deleted(self):
+        etag = self.get_etag(self.carol)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flat.delete()
+        self.assertModified(self.carol, etag)
+
+
+class GroupDeleteViewTests(SplitTestCase):
+    def test_post_soft_deletes_and_keeps_expenses(self):
+        expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+        self.client.force_login(self.alice)
+
+        response = self.client.post(reverse("group_delete", args=[self.trip.pk]))
+
+        self.assertRedirects(response, reverse("group_list"), fetch_redirect_response=False)
+        self.trip.refresh_from_db()
+        self.assertFalse(self.trip.is_active)
+        self.assertTrue(Expense.objects.filter(pk=expense.pk).exists())
+        self.assertEqual(ExpenseSplit.objects.filter(expense=expense).count(), 2)
+
+
+class ExpenseDetailViewTests(SplitTestCase):
+    def setUp(self):
+        super().setUp()
+        self.expense = self.create_expense(self.trip, Decimal("100"), self.alice, [self.alice, self.bob])
+
+    def test_member_who_did_not_create_the_expense(self):
+        self.client.force_login(self.bob)
+        response = self.client.get(reverse("expense_detail", args=[self.expense.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([split.user for split in response.context["splits"]], [self.alice, self.bob])
+
+    # The 404 page links static files, the manifest only exists after collectstatic
+    @override_settings(STORAGES={"staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}})
+    def test_non_member(self):
+        self.client.force_login(self.carol)
+        response = self.client.get(reverse("expense_detail", args=[self.expense.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ExpenseListViewTests(SplitTestCase):
+    @mock.patch.object(ExpenseListView, "page_size", 3)
+    def test_cursor_pages_on_the_same_date(self):
+        dates = [datetime.date(2025, 1, 2)] + [datetime.date(2025, 1, 1)] * 4 + [datetime.date(2024, 12, 31)]
+        for date in dates:
+            Expense.objects.create(
+                description="Coffee",
+                amount=Money(5, "INR"),
+                expense_type=Expense.ExpenseType.PERSONAL,
+                user=self.alice,
+                paid_by=self.alice,
+                category=self.category,
+                date=date,
+            )
+        self.client.force_login(self.alice)
+
+        response = self.client.get(reverse("expense_list"))
+        first_page = [expense.pk for expense in response.context["expenses"]]
+        cursor = response.context["next_expense"]
+        response = self.client.get(
+            reverse("expense_list"), {"before_date": cursor.date.isoformat(), "before_id": cursor.pk}
+        )
+        second_page = [expense.pk for expense in response.context["expenses"]]
+
+        # The cursor falls inside the run of expenses dated 2025-01-01
+        self.assertEqual(cursor.date, datetime.date(2025, 1, 1))
+        self.assertIsNone(response.context["next_expense"])
+        self.assertEqual(
+            first_page + second_page, list(Expense.objects.order_by("-date", "-id").values_list("pk", flat=True))
+        )
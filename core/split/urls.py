@@ -9,6 +9,7 @@ urlpatterns = [
     path("groups/", views.GroupListView.as_view(), name="group_list"),
     path("groups/create/", views.GroupCreateView.as_view(), name="group_create"),
     path("groups/<int:pk>/", views.GroupDetailView.as_view(), name="group_detail"),
+    path("groups/<int:pk>/balances/", views.GroupBalancesView.as_view(), name="group_balances"),
     path("groups/<int:pk>/edit/", views.GroupUpdateView.as_view(), name="group_update"),
     path("groups/<int:pk>/delete/", views.GroupDeleteView.as_view(), name="group_delete"),
     # Expenses
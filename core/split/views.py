@@ -1,15 +1,39 @@
 # Create your views here.
 from decimal import Decimal
+from operator import attrgetter
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Q, Sum
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, TemplateView, UpdateView
 
+from accounts.models import User
+
+from .caching import (
+    CATEGORY_CACHE_TIMEOUT,
+    DASHBOARD_CACHE_TIMEOUT,
+    category_cache_key,
+    dashboard_cache_key,
+    group_count_cache_key,
+    invalidate_group_caches,
+    list_etag,
+    settlement_count_cache_key,
+)
 from .forms import CategoryForm, ExpenseForm, GroupForm, SettlementForm, SimpleSplitForm
-from .models import Category, Expense, ExpenseSplit, Group, Settlement
+from .models import Category, Expense, ExpenseSplit, Group, GroupMemberBalance, Settlement
+from .pagination import CachedCountMixin
+
+# List pages are personal: only the browser may keep them, and it revalidates with the ETag on every visit
+list_conditions = [cache_control(private=True, no_cache=True), condition(etag_func=list_etag)]
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -28,50 +52,61 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             expense_count=Count("expenses")
         )
 
+        # Balances and recent expenses are cached per user and dropped by the signals in signals.py
+        context.update(
+            cache.get_or_set(
+                dashboard_cache_key(user.id), lambda: self.get_dashboard_data(user), DASHBOARD_CACHE_TIMEOUT
+            )
+        )
+
+        return context
+
+    def get_dashboard_data(self, user):
+        """
+        Build the cacheable part of the dashboard, querysets are evaluated so they can be pickled
+        """
         # Get recent personal expenses
-        context["recent_personal_expenses"] = Expense.objects.filter(
-            user=user, expense_type=Expense.ExpenseType.PERSONAL
-        )[:5]
+        recent_personal = Expense.objects.filter(user=user, expense_type=Expense.ExpenseType.PERSONAL).only(
+            "id", "description", "amount", "amount_currency", "date"
+        )
 
         # Get recent group expenses
-        context["recent_group_expenses"] = Expense.objects.filter(
-            group__members=user, expense_type=Expense.ExpenseType.GROUP
-        ).select_related("group", "paid_by", "category")[:10]
-
-        # Calculate balances (simplified - you may want to optimize this)
-        balances = self.calculate_user_balances(user)
-        context["balances"] = balances
+        recent_group = (
+            Expense.objects.filter(group__members=user, expense_type=Expense.ExpenseType.GROUP)
+            .select_related("group", "paid_by")
+            .only("id", "description", "amount", "amount_currency", "date", "group__name", "paid_by__full_name")
+        )
 
-        return context
+        return {
+            "recent_personal_expenses": list(recent_personal[:5]),
+            "recent_group_expenses": list(recent_group[:10]),
+            "balances": self.calculate_user_balances(user),
+        }
 
     def calculate_user_balances(self, user):
         """
         Calculate how much user owes or is owed in each group
         """
-        balances = []
-        groups = Group.objects.filter(members=user, is_active=True)
-
-        for group in groups:
-            # Amount user paid
-            paid = Expense.objects.filter(group=group, paid_by=user, expense_type=Expense.ExpenseType.GROUP).aggregate(
-                total=Sum("amount")
-            )["total"] or Decimal("0.00")
-
-            # Amount user owes
-            owed = ExpenseSplit.objects.filter(expense__group=group, user=user, is_settled=False).aggregate(
-                total=Sum("amount")
-            )["total"] or Decimal("0.00")
-
-            balance = paid - owed
+        # Read the running totals kept by signals.py instead of summing every expense and split
+        rows = (
+            GroupMemberBalance.objects.unsettled()
+            .filter(user=user, group__members=user, group__is_active=True)
+            .select_related("group")
+            .only("paid_total", "owed_total", "group__id", "group__name")
+            .order_by("-group__created")
+        )
 
-            if balance != 0:
-                balances.append({"group": group, "balance": balance, "status": "owed" if balance > 0 else "owes"})
+        balances = [
+            {"group": row.group, "balance": row.balance, "status": "owed" if row.balance > 0 else "owes"}
+            for row in rows
+        ]
 
         return balances
 
 
 # Group Views
-class GroupListView(LoginRequiredMixin, ListView):
+@method_decorator(list_conditions, name="dispatch")
+class GroupListView(LoginRequiredMixin, CachedCountMixin, ListView):
     """
     List all groups user is a member of
     """
@@ -82,16 +117,33 @@ class GroupListView(LoginRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
+        # Count each relation in its own subquery, joining both would multiply expenses by members
+        # and the members join would be the one already restricted to the current user
+        expense_count = (
+            Expense.objects.filter(group=OuterRef("pk")).order_by().values("group").annotate(count=Count("*"))
+        )
+        member_count = (
+            Group.members.through.objects.filter(group=OuterRef("pk"))
+            .order_by()
+            .values("group")
+            .annotate(count=Count("*"))
+        )
         return (
             Group.objects.filter(members=self.request.user, is_active=True)
-            .annotate(expense_count=Count("expenses"), member_count=Count("members"))
+            .annotate(
+                expense_count=Coalesce(Subquery(expense_count.values("count"), output_field=IntegerField()), 0),
+                member_count=Coalesce(Subquery(member_count.values("count"), output_field=IntegerField()), 0),
+            )
             .order_by("-created")
         )
 
+    def get_count_cache_key(self):
+        return group_count_cache_key(self.request.user.id)
+
 
 class GroupDetailView(LoginRequiredMixin, DetailView):
     """
-    Detailed view of a group with expenses and balances
+    Detailed view of a group with expenses, the balances are loaded afterwards from GroupBalancesView
     """
 
     model = Group
@@ -99,22 +151,31 @@ class GroupDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "group"
 
     def get_queryset(self):
-        return Group.objects.filter(members=self.request.user, is_active=True)
+        # The template lists the members
+        return Group.objects.filter(is_active=True).prefetch_related(
+            Prefetch("members", queryset=User.objects.only("id", "email", "full_name"))
+        )
+
+    def get_object(self, queryset=None):
+        group = super().get_object(queryset)
+        # Check membership against the prefetched members rather than joining them into the group lookup
+        if not group.is_member(self.request.user):
+            raise Http404("No group found matching the query")
+        return group
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         group = self.object
 
-        # Get group expenses
+        # Get group expenses, the one unbounded listing: keep each row to the columns the template renders
+        # ({% for %} turns an iterator() back into a list, so narrowing the rows is what bounds memory here)
         context["expenses"] = (
             Expense.objects.filter(group=group, expense_type=Expense.ExpenseType.GROUP)
             .select_related("paid_by", "category")
+            .only("id", "description", "amount", "amount_currency", "date", "paid_by__full_name", "category__name")
             .order_by("-date")
         )
 
-        # Calculate balances between members
-        context["balances"] = self.calculate_group_balances(group)
-
         # Get recent settlements
         context["settlements"] = (
             Settlement.objects.filter(group=group)
@@ -124,25 +185,60 @@ class GroupDetailView(LoginRequiredMixin, DetailView):
 
         return context
 
+
+class GroupBalancesView(LoginRequiredMixin, DetailView):
+    """
+    Balances between group members, fetched by the group detail page once it has rendered
+    """
+
+    model = Group
+    template_name = "expenses/_group_balances.html"
+    context_object_name = "group"
+
+    def get_queryset(self):
+        return Group.objects.filter(members=self.request.user, is_active=True).only("id")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Calculate balances between members
+        context["balances"] = self.calculate_group_balances(self.object)
+        return context
+
     def calculate_group_balances(self, group):
         """
         Calculate balances between all group members
         """
-        members = group.members.all()
-        balances = {}
-
-        for member in members:
-            # Amount member paid
-            paid = Expense.objects.filter(
-                group=group, paid_by=member, expense_type=Expense.ExpenseType.GROUP
-            ).aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+        zero = Value(Decimal("0.00"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+        # Amount each member paid and owes, summed in correlated subqueries so the members come back
+        # with their totals in one round trip; joining expenses and splits directly would fan out
+        paid = (
+            Expense.objects.filter(group=group, paid_by=OuterRef("pk"), expense_type=Expense.ExpenseType.GROUP)
+            .order_by()
+            .values("paid_by")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        )
+        owed = (
+            ExpenseSplit.objects.filter(expense__group=group, user=OuterRef("pk"))
+            .order_by()
+            .values("user")
+            .annotate(total=Sum("amount_value"))
+            .values("total")
+        )
 
-            # Amount member owes
-            owed = ExpenseSplit.objects.filter(expense__group=group, user=member).aggregate(total=Sum("amount"))[
-                "total"
-            ] or Decimal("0.00")
+        members = (
+            group.members.only("id", "email", "full_name")
+            .annotate(
+                paid=Coalesce(Subquery(paid, output_field=zero.output_field), zero),
+                owed=Coalesce(Subquery(owed, output_field=zero.output_field), zero),
+            )
+            .annotate(balance=F("paid") - F("owed"))
+        )
 
-            balances[member] = {"paid": paid, "owed": owed, "balance": paid - owed}
+        balances = {
+            member: {"paid": member.paid, "owed": member.owed, "balance": member.balance} for member in members
+        }
 
         return balances
 
@@ -203,48 +299,113 @@ class GroupDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("group_list")
 
     def get_queryset(self):
-        # Only group creator can delete
-        return Group.objects.filter(created_by=self.request.user, is_active=True)
+        # Only group creator can delete, the confirmation page and the message only show the name
+        return Group.objects.filter(created_by=self.request.user, is_active=True).only("id", "name")
+
+    def form_valid(self, form):
+        # DeleteView deletes the row from form_valid() on POST
+        return self.soft_delete()
 
     def delete(self, request, *args, **kwargs):
         self.object = self.get_object()
-        self.object.is_active = False
-        self.object.save()
-        messages.success(request, f'Group "{self.object.name}" deleted successfully!')
+        return self.soft_delete()
+
+    def soft_delete(self):
+        # Flip the one column instead of rewriting the whole row, update() sends no post_save
+        Group.objects.filter(pk=self.object.pk).update(is_active=False)
+        invalidate_group_caches(self.object.pk)
+        messages.success(self.request, f'Group "{self.object.name}" deleted successfully!')
         return redirect(self.success_url)
 
 
 # Expense Views
+@method_decorator(list_conditions, name="dispatch")
 class ExpenseListView(LoginRequiredMixin, ListView):
     """
-    List all expenses (personal and group)
+    List all expenses (personal and group), loaded incrementally with a (date, id) cursor
     """
 
     model = Expense
     template_name = "expenses/expense_list.html"
+    rows_template_name = "expenses/_expense_rows.html"
     context_object_name = "expenses"
-    paginate_by = 20
+    page_size = 40
+
+    def get(self, request, *args, **kwargs):
+        self.cursor = self.get_cursor()
+        return super().get(request, *args, **kwargs)
+
+    def get_cursor(self):
+        """
+        Read the (date, id) of the last expense already shown, if any
+        """
+        try:
+            before_date = parse_date(self.request.GET.get("before_date", ""))
+            before_id = int(self.request.GET.get("before_id", ""))
+        except ValueError:
+            return None
+
+        if before_date is None:
+            return None
+
+        return before_date, before_id
 
     def get_queryset(self):
         user = self.request.user
         expense_type = self.request.GET.get("type", "all")
 
+        # Expenses the user created plus those of their groups, as a UNION of ids rather than an OR
+        # across the members join, which scans both sides and repeats expenses once per matching member
+        own = Expense.objects.filter(user=user)
+        shared = Expense.objects.filter(group__in=Group.members.through.objects.filter(user=user).values("group_id"))
+
+        if expense_type == "personal":
+            # Personal expenses have no group, the shared side can't match
+            expense_ids = own.filter(expense_type=Expense.ExpenseType.PERSONAL).order_by().values("id")
+        else:
+            if expense_type == "group":
+                own = own.filter(expense_type=Expense.ExpenseType.GROUP)
+                shared = shared.filter(expense_type=Expense.ExpenseType.GROUP)
+            expense_ids = own.order_by().values("id").union(shared.order_by().values("id"))
+
         queryset = (
-            Expense.objects.filter(Q(user=user) | Q(group__members=user))
-            .select_related("user", "paid_by", "group", "category")
-            .order_by("-date", "-created")
+            Expense.objects.filter(pk__in=expense_ids)
+            .select_related("paid_by", "group", "category")
+            # Only the columns the rows template renders
+            .only(
+                "id",
+                "description",
+                "amount",
+                "amount_currency",
+                "date",
+                "expense_type",
+                "user",
+                "paid_by__full_name",
+                "group__name",
+                "category__name",
+            )
+            .order_by("-date", "-id")
         )
 
-        if expense_type == "personal":
-            queryset = queryset.filter(expense_type=Expense.ExpenseType.PERSONAL)
-        elif expense_type == "group":
-            queryset = queryset.filter(expense_type=Expense.ExpenseType.GROUP)
+        # Fetch one extra row to know whether another page follows
+        if self.cursor:
+            return queryset.page_before(*self.cursor, limit=self.page_size + 1)
+        return queryset[: self.page_size + 1]
 
-        return queryset
+    def get_template_names(self):
+        # Follow-up pages requested while scrolling only need the rows
+        if self.cursor:
+            return [self.rows_template_name]
+        return [self.template_name]
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        expenses = list(self.object_list)
+        has_more = len(expenses) > self.page_size
+        expenses = expenses[: self.page_size]
+
+        context = super().get_context_data(object_list=expenses, **kwargs)
         context["expense_type"] = self.request.GET.get("type", "all")
+        context["next_expense"] = expenses[-1] if has_more else None
         return context
 
 
@@ -258,16 +419,29 @@ class ExpenseDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "expense"
 
     def get_queryset(self):
-        return Expense.objects.filter(Q(user=self.request.user) | Q(group__members=self.request.user)).select_related(
-            "user", "paid_by", "group", "category"
-        )
+        return Expense.objects.select_related("user", "paid_by", "group", "category")
+
+    def get_object(self, queryset=None):
+        expenses = self.get_queryset() if queryset is None else queryset
+        pk = self.kwargs.get(self.pk_url_kwarg)
+
+        # Most expenses are opened by their creator, a plain pk lookup without the group membership join
+        try:
+            return expenses.get(pk=pk, user=self.request.user)
+        except Expense.DoesNotExist:
+            pass
+
+        # Otherwise the expense must belong to one of the user's groups. Filtering on the group ids
+        # rather than group__members keeps it to one row whatever the number of members
+        member_group_ids = Group.members.through.objects.filter(user=self.request.user).values("group_id")
+        return get_object_or_404(expenses, pk=pk, group__in=member_group_ids)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         if self.object.expense_type == Expense.ExpenseType.GROUP:
             context["splits"] = (
-                ExpenseSplit.objects.filter(expense=self.object).select_related("user").order_by("user__username")
+                ExpenseSplit.objects.filter(expense=self.object).select_related("user").order_by("user__full_name")
             )
 
         return context
@@ -393,7 +567,7 @@ class SettlementCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class SettlementListView(LoginRequiredMixin, ListView):
+class SettlementListView(LoginRequiredMixin, CachedCountMixin, ListView):
     """
     List all settlements for a group
     """
@@ -403,21 +577,33 @@ class SettlementListView(LoginRequiredMixin, ListView):
     context_object_name = "settlements"
     paginate_by = 20
 
+    def get(self, request, *args, **kwargs):
+        # Check membership once, before paginating, so a non-member can't cache an empty count for the group
+        self.group = get_object_or_404(
+            Group.objects.only("id", "name"), pk=self.kwargs["group_pk"], members=self.request.user
+        )
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
-        group_pk = self.kwargs.get("group_pk")
+        # The manager also joins the group, which is already on self.group
         return (
-            Settlement.objects.filter(group__pk=group_pk, group__members=self.request.user)
+            Settlement.objects.filter(group=self.group)
+            .select_related(None)
             .select_related("paid_by", "paid_to")
             .order_by("-settlement_date")
         )
 
+    def get_count_cache_key(self):
+        return settlement_count_cache_key(self.group.pk)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["group"] = get_object_or_404(Group, pk=self.kwargs["group_pk"], members=self.request.user)
+        context["group"] = self.group
         return context
 
 
 # Category Views
+@method_decorator(list_conditions, name="dispatch")
 class CategoryListView(LoginRequiredMixin, ListView):
     """
     List all categories (system and user-created)
@@ -428,7 +614,16 @@ class CategoryListView(LoginRequiredMixin, ListView):
     context_object_name = "categories"
 
     def get_queryset(self):
-        return Category.objects.filter(Q(created_by=None) | Q(created_by=self.request.user)).order_by("name")
+        # System and own categories are cached apart, a change to a system category then drops a single entry
+        categories = self.get_cached_categories(None) + self.get_cached_categories(self.request.user.id)
+        return sorted(categories, key=attrgetter("name"))
+
+    def get_cached_categories(self, user_id):
+        return cache.get_or_set(
+            category_cache_key(user_id),
+            lambda: list(Category.objects.filter(created_by_id=user_id).only("id", "name", "created_by")),
+            CATEGORY_CACHE_TIMEOUT,
+        )
 
 
 class CategoryCreateView(LoginRequiredMixin, CreateView):